@@ -32,7 +32,13 @@ node src/generate-glyphs.js
 
 echo ""
 echo "Step 2/2: Building font files…"
-python3 src/build-font.py
+if command -v ninja &>/dev/null; then
+  # Incremental build: ninja reruns only stages whose inputs changed
+  python3 src/build-font.py --write-ninja
+  ninja
+else
+  python3 src/build-font.py
+fi
 
 echo ""
 echo -e "${GREEN}Done!${NC}  Font files are in ./fonts/"
@@ -11,12 +11,27 @@ Installation:
   Or use FontForge AppImage with built-in Python
 """
 
+import argparse
 import fontforge
+import hashlib
 import json
+import math
+import psMat
+import multiprocessing
 import os
+import re
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# orjson parses the 10k-entry metadata files several times faster than
+# the stdlib; it is optional and stdlib json is used when not installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Font metadata
 FONT_NAME = "Cistercian"
 FONT_FAMILY = "Cistercian"
@@ -25,12 +40,28 @@ FONT_VERSION = "1.0.0"
 FONT_COPYRIGHT = "Based on Cistercian numerals (public domain)"
 FONT_WEIGHT = "Regular"
 
+# OpenType glyph names for the ASCII digits, indexable by ord(d) - 48
+DIGIT_GLYPHS = ("zero", "one", "two", "three", "four",
+                "five", "six", "seven", "eight", "nine")
+
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 GLYPHS_DIR = PROJECT_ROOT / "glyphs"
 METADATA_DIR = PROJECT_ROOT / "metadata"
 FONTS_DIR = PROJECT_ROOT / "fonts"
+BUILD_DIR = PROJECT_ROOT / "build"
+
+# Intermediate font with all glyphs imported (the sfd stage's output and
+# the ttf stage's input when building incrementally under ninja)
+SFD_PATH = BUILD_DIR / f"{FONT_NAME}.sfd"
+
+def _load_json(path):
+    """Parse a JSON file, with orjson when it is installed"""
+    data = path.read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 def load_metadata():
     """Load glyph and ligature metadata"""
@@ -44,13 +75,17 @@ def load_metadata():
         print("Please run generate-glyphs.js first")
         sys.exit(1)
 
-    with open(glyphs_meta_path, 'r') as f:
-        glyphs_data = json.load(f)
+    glyphs_data = _load_json(glyphs_meta_path)
+    ligatures_data = _load_json(ligatures_meta_path)
 
-    with open(ligatures_meta_path, 'r') as f:
-        ligatures_data = json.load(f)
+    # Component metadata is optional: older generator output predates it,
+    # in which case every numeral is imported from its own SVG.
+    components_meta_path = METADATA_DIR / "components.json"
+    components_data = None
+    if components_meta_path.exists():
+        components_data = _load_json(components_meta_path)
 
-    return glyphs_data, ligatures_data
+    return glyphs_data, ligatures_data, components_data
 
 def create_font(glyphs_data):
     """Create a new font with proper metrics"""
@@ -78,11 +113,12 @@ def create_font(glyphs_data):
 
     return font
 
-def import_svg_glyph(font, svg_path, glyph_name, glyph_width):
+def import_svg_glyph(font, svg_path, glyph_name, glyph_width, bbox=None,
+                     center=True, codepoint=-1):
     """Import an SVG file as a glyph"""
     try:
         # Create glyph in font
-        glyph = font.createChar(-1, glyph_name)
+        glyph = font.createChar(codepoint, glyph_name)
 
         # Import SVG
         glyph.importOutlines(str(svg_path))
@@ -90,17 +126,28 @@ def import_svg_glyph(font, svg_path, glyph_name, glyph_width):
         # Set glyph width
         glyph.width = glyph_width
 
-        # Center the glyph horizontally
-        bbox = glyph.boundingBox()
+        if not center:
+            # Component glyphs keep their absolute position so that
+            # references to them line up without per-reference offsets.
+            return True
+
+        # Center the glyph horizontally. The generator precomputes each
+        # glyph's bounding box in font units, which saves FontForge an
+        # extrema traversal over every spline point; fall back to
+        # boundingBox() for metadata written before the bbox field existed.
+        if bbox is None:
+            bbox = glyph.boundingBox()
         if bbox[0] != bbox[2]:  # If glyph has content
             # Calculate centering offset
             glyph_actual_width = bbox[2] - bbox[0]
             offset = (glyph_width - glyph_actual_width) / 2 - bbox[0]
 
-            # Transform to center using psMat
-            import psMat
-            matrix = psMat.translate(offset, 0)
-            glyph.transform(matrix)
+            # Shift via the side bearing rather than glyph.transform():
+            # FontForge applies a bearing change without walking every
+            # spline point, and setting the width afterwards restores the
+            # fixed advance.
+            glyph.left_side_bearing = glyph.left_side_bearing + int(round(offset))
+            glyph.width = glyph_width
 
         return True
 
@@ -108,39 +155,253 @@ def import_svg_glyph(font, svg_path, glyph_name, glyph_width):
         print(f"  Error importing {svg_path}: {e}")
         return False
 
-def add_glyphs(font, glyphs_data):
-    """Add all Cistercian numeral glyphs to the font"""
-    print("\nImporting glyphs...")
-
-    glyphs = glyphs_data['glyphs']
-    total = len(glyphs)
-    imported = 0
+# Matches the <line> elements the generator emits for every glyph
+_SVG_LINE_RE = re.compile(r'<line[^>]*>')
+
+def _svg_line_attr(line, name, default=0.0):
+    """Read a numeric attribute off a serialized <line> element"""
+    match = re.search(rf'\b{name}="(-?[\d.]+)"', line)
+    return float(match.group(1)) if match else default
+
+def _stroked_line_corners(x1, y1, x2, y2, half_width):
+    """Corners of a stroked line segment with square caps, in draw order.
+
+    A square-capped stroke is exactly the rectangle formed by extending
+    each endpoint half a stroke width along the line and offsetting half
+    a stroke width to either side.
+    """
+    length = math.hypot(x2 - x1, y2 - y1) or 1.0
+    ux = (x2 - x1) / length * half_width
+    uy = (y2 - y1) / length * half_width
+    return (
+        (x1 - ux - uy, y1 - uy + ux),
+        (x2 + ux - uy, y2 + uy + ux),
+        (x2 + ux + uy, y2 + uy - ux),
+        (x1 - ux + uy, y1 - uy - ux),
+    )
+
+def _convert_glyph_chunk(args):
+    """Worker process: convert a chunk of glyph SVGs to SFD text.
+
+    The glyph SVGs contain nothing but stroked <line> elements with
+    square caps, so each line converts exactly to a closed 4-point
+    contour without going through FontForge's SVG importer. Workers
+    return per-glyph (name, width, splineset) tuples; the parent assigns
+    contiguous encoding slots, stitches one SFD, and merges the whole
+    batch into the font with a single mergeFonts() call, replacing ~5
+    Python-to-C crossings per glyph with one big C call.
+    """
+    chunk, config, present_svgs = args
+
+    # Same SVG -> font-unit mapping the generator uses for bbox metadata:
+    # the viewBox height spans the em, y flipped against the ascender.
+    scale = config['unitsPerEm'] / config['svgHeight']
+    ascent = config['ascender']
+    half_width = config['strokeWidth'] / 2
+
+    blocks = []
     failed = 0
+    glyphs_dir = str(GLYPHS_DIR)
 
-    for i, glyph_meta in enumerate(glyphs):
+    for glyph_meta in chunk:
         number = glyph_meta['number']
         glyph_name = glyph_meta['glyphName']
         glyph_width = glyph_meta['width']
 
-        # Construct SVG path
-        svg_filename = f"cistercian_{str(number).zfill(4)}.svg"
-        svg_path = GLYPHS_DIR / svg_filename
+        # The generator emits the filename in the metadata; reconstruct it
+        # only for older metadata ("%04d" is the cheapest int formatting)
+        svg_filename = glyph_meta.get('svgFile') or "cistercian_%04d.svg" % number
 
-        if not svg_path.exists():
+        if svg_filename not in present_svgs:
             print(f"  Warning: SVG not found for {number}")
             failed += 1
             continue
 
-        # Import glyph
-        if import_svg_glyph(font, svg_path, glyph_name, glyph_width):
-            imported += 1
-        else:
+        with open(os.path.join(glyphs_dir, svg_filename)) as f:
+            svg_text = f.read()
+
+        contours = []
+        x_min = x_max = None
+        for line in _SVG_LINE_RE.findall(svg_text):
+            corners = _stroked_line_corners(
+                _svg_line_attr(line, 'x1'), _svg_line_attr(line, 'y1'),
+                _svg_line_attr(line, 'x2'), _svg_line_attr(line, 'y2'),
+                _svg_line_attr(line, 'stroke-width', half_width * 2) / 2)
+            points = [(x * scale, ascent - y * scale) for x, y in corners]
+            contours.append(points)
+            for x, _ in points:
+                x_min = x if x_min is None else min(x_min, x)
+                x_max = x if x_max is None else max(x_max, x)
+
+        if not contours:
+            print(f"  Warning: no outline data for {number}")
             failed += 1
+            continue
+
+        # Center within the advance width by shifting the points directly
+        offset = (glyph_width - (x_max - x_min)) / 2 - x_min
+
+        splines = []
+        for points in contours:
+            first = points[0]
+            splines.append(f"{first[0] + offset:g} {first[1]:g} m 1\n")
+            for x, y in points[1:]:
+                splines.append(f" {x + offset:g} {y:g} l 1\n")
+            splines.append(f" {first[0] + offset:g} {first[1]:g} l 1\n")
+        blocks.append((glyph_name, glyph_width, "".join(splines)))
+
+    return blocks, failed
+
+def _assemble_composite_glyphs(font, glyphs_data, components_data):
+    """Assemble numeral glyphs from shared component outlines.
+
+    Every Cistercian numeral is the stem plus up to four quadrant
+    strokes, and thousands of numerals share identical strokes. Instead
+    of parsing ~10000 SVG outlines, import the ~37 component shapes once
+    and build each numeral with glyph.addReference(), which TrueType
+    stores natively as composite glyphs (shrinking the glyf table too).
+
+    Returns (assembled_count, leftover_glyph_metas); leftovers are
+    numerals the generator could not decompose, to be imported from
+    their own SVGs.
+    """
+    glyph_width = glyphs_data['fontConfig']['glyphWidth']
+
+    print("\nImporting component glyphs...")
+    for component in components_data['components']:
+        svg_path = GLYPHS_DIR / component['svgFile']
+        if not svg_path.exists() or not import_svg_glyph(
+                font, svg_path, component['name'], glyph_width, center=False):
+            print(f"  Warning: component {component['name']} unavailable, "
+                  "falling back to per-glyph import")
+            return 0, glyphs_data['glyphs']
+    print(f"  Imported {len(components_data['components'])} components")
+
+    print("Assembling composite glyphs...")
+    component_map = components_data['glyphs']
+    assembled = 0
+    leftover = []
+
+    for glyph_meta in glyphs_data['glyphs']:
+        parts = component_map.get(glyph_meta['glyphName'])
+        if not parts:
+            leftover.append(glyph_meta)
+            continue
+
+        glyph = font.createChar(-1, glyph_meta['glyphName'])
+
+        # Components sit at their absolute SVG position; a single
+        # translate centers the whole assembly within the advance width.
+        bbox = glyph_meta.get('bbox')
+        offset = 0
+        if bbox and bbox[0] != bbox[2]:
+            offset = (glyph_meta['width'] - (bbox[2] - bbox[0])) / 2 - bbox[0]
+        matrix = psMat.translate(round(offset), 0)
+
+        for part in parts:
+            glyph.addReference(part, matrix)
+        glyph.width = glyph_meta['width']
+        assembled += 1
+
+    print(f"  Assembled {assembled} composite glyphs")
+
+    return assembled, leftover
+
+def add_glyphs(font, glyphs_data, components_data=None):
+    """Add all Cistercian numeral glyphs to the font"""
+    print("\nImporting glyphs...")
+
+    glyphs = glyphs_data['glyphs']
+    imported = 0
+    failed = 0
+
+    # Fast path: assemble numerals as composites of the shared component
+    # outlines. Only numerals without a component decomposition (or all
+    # of them, with pre-component metadata) fall through to SVG import.
+    if components_data is not None:
+        assembled, glyphs = _assemble_composite_glyphs(
+            font, glyphs_data, components_data)
+        imported += assembled
+
+    if not glyphs:
+        print(f"\nGlyph import complete:")
+        print(f"  Imported: {imported}")
+        print(f"  Failed: {failed}")
+        return imported > 0
+
+    total = len(glyphs)
 
-        # Progress reporting
-        if (i + 1) % 500 == 0:
-            progress = (i + 1) / total * 100
-            print(f"  Progress: {i + 1}/{total} ({progress:.1f}%)")
+    # Converting the SVGs is pure Python and independent per glyph, so
+    # fan the work out across one worker process per core. Each worker
+    # returns its chunk as SFD text; the parent stitches the fragments
+    # into a single SFD and merges it with one mergeFonts() call instead
+    # of crossing the Python/C boundary several times per glyph.
+    workers = os.cpu_count() or 1
+    workers = min(workers, total) or 1
+    chunk_size = -(-total // workers)  # ceiling division
+    config = glyphs_data['fontConfig']
+
+    # One directory read replaces a stat() syscall per glyph: workers
+    # test membership in this inventory instead of calling exists().
+    present_svgs = frozenset(
+        e.name for e in os.scandir(GLYPHS_DIR) if e.name.endswith('.svg'))
+
+    jobs = []
+    for w in range(workers):
+        chunk = glyphs[w * chunk_size:(w + 1) * chunk_size]
+        if not chunk:
+            continue
+        jobs.append((chunk, config, present_svgs))
+
+    print(f"  Using {len(jobs)} worker process(es)")
+
+    sfd_blocks = []
+    with multiprocessing.Pool(len(jobs)) as pool:
+        for i, (chunk_blocks, chunk_failed) in enumerate(
+            pool.imap(_convert_glyph_chunk, jobs)
+        ):
+            sfd_blocks.extend(chunk_blocks)
+            failed += chunk_failed
+            progress = (i + 1) / len(jobs) * 100
+            print(f"  Progress: {i + 1}/{len(jobs)} chunks ({progress:.1f}%)")
+
+    sfd_imported = len(sfd_blocks)
+    imported += sfd_imported
+
+    # The merged SFD is a pure intermediate, written once and read once —
+    # keep it in shared memory where the platform provides it so this
+    # phase never waits on disk. Encoding slots are assigned contiguously
+    # here, after failures are known, so the BeginChars header (map size
+    # and char count, both covering only this SFD) always matches the
+    # chars the file actually contains.
+    tmp_root = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    with tempfile.TemporaryDirectory(prefix="cistercian-sfd-",
+                                     dir=tmp_root) as tmp_dir:
+        sfd_path = os.path.join(tmp_dir, "glyphs.sfd")
+        with open(sfd_path, 'w') as f:
+            f.write("SplineFontDB: 3.2\n"
+                    f"FontName: {FONT_NAME}-import\n"
+                    f"Ascent: {config['ascender']}\n"
+                    f"Descent: {abs(config['descender'])}\n"
+                    "LayerCount: 2\n"
+                    'Layer: 0 0 "Back" 1\n'
+                    'Layer: 1 0 "Fore" 0\n'
+                    "Encoding: Custom\n"
+                    f"BeginChars: {max(sfd_imported, 1)} {sfd_imported}\n")
+            for enc, (glyph_name, glyph_width, splines) in enumerate(sfd_blocks):
+                f.write(f"StartChar: {glyph_name}\n"
+                        f"Encoding: {enc} -1 {enc}\n"
+                        f"Width: {glyph_width}\n"
+                        "Flags: W\n"
+                        "LayerCount: 2\n"
+                        "Fore\n"
+                        "SplineSet\n")
+                f.write(splines)
+                f.write("EndSplineSet\nEndChar\n")
+            f.write("EndChars\nEndSplineFont\n")
+
+        if sfd_imported > 0:
+            font.mergeFonts(sfd_path)
 
     print(f"\nGlyph import complete:")
     print(f"  Imported: {imported}")
@@ -148,52 +409,68 @@ def add_glyphs(font, glyphs_data):
 
     return imported > 0
 
-def add_basic_glyphs(font):
+def add_basic_glyphs(font, glyphs_data):
     """Add basic ASCII digits (0-9) as fallback"""
     print("\nAdding basic digit glyphs...")
 
-    # Create digit glyphs with proper names
-    digit_glyph_names = {
-        "0": "zero",
-        "1": "one",
-        "2": "two",
-        "3": "three",
-        "4": "four",
-        "5": "five",
-        "6": "six",
-        "7": "seven",
-        "8": "eight",
-        "9": "nine"
-    }
+    # The digits are the ligature inputs, so they ship in the font either
+    # way — give them the generator's seven-segment outlines so apps with
+    # ligatures disabled still render something meaningful instead of
+    # blank 600-unit advances.
+    digit_meta = {d['digit']: d for d in glyphs_data.get('digitGlyphs', [])}
 
+    outlined = 0
     for digit in range(10):
         digit_str = str(digit)
-        glyph_name = digit_glyph_names[digit_str]
+        glyph_name = DIGIT_GLYPHS[digit]
+
+        meta = digit_meta.get(digit)
+        svg_path = GLYPHS_DIR / meta['svgFile'] if meta else None
+        if svg_path is not None and svg_path.exists():
+            if import_svg_glyph(font, svg_path, glyph_name, meta['width'],
+                                bbox=meta.get('bbox'),
+                                codepoint=ord(digit_str)):
+                outlined += 1
+                continue
+
+        # Metadata predating the digit outlines: keep the old empty glyph
         glyph = font.createChar(ord(digit_str), glyph_name)
         glyph.width = 600
 
-        # Add a simple representation (optional - could be left empty)
-        # For now, we'll leave them empty as they'll be replaced by ligatures
+    if outlined:
+        print(f"  Added digits 0-9 with fallback outlines")
+    else:
+        print("  Added digits 0-9 with glyph names (no outlines in metadata)")
 
-    print("  Added digits 0-9 with glyph names")
-
-def create_ligature_feature(font, ligatures_data):
-    """Create OpenType ligature feature"""
+def create_ligature_feature(ligatures_data):
+    """Generate the OpenType ligature feature code"""
     print("\nCreating ligature features...")
 
-    # Map digit characters to their OpenType glyph names
-    digit_to_glyph = {
-        "0": "zero",
-        "1": "one",
-        "2": "two",
-        "3": "three",
-        "4": "four",
-        "5": "five",
-        "6": "six",
-        "7": "seven",
-        "8": "eight",
-        "9": "nine",
-    }
+    # The rendered feature code is a pure function of the ligature
+    # mappings, so cache it keyed by a hash of their canonical
+    # serialization rather than of the raw ligatures.json bytes, which
+    # would also churn on incidental changes such as reformatting. A
+    # renderer version is mixed in so cached output from older rendering
+    # logic is never reused after the renderer changes.
+    FEA_RENDERER_VERSION = b"2"  # bump when the rendered output changes
+    FEA_CACHE_KEEP = 4
+    cache_dir = METADATA_DIR / ".features.cache"
+    feature_path = METADATA_DIR / "features.fea"
+    digest = hashlib.blake2b(FEA_RENDERER_VERSION)
+    digest.update(json.dumps(ligatures_data['mappings'], sort_keys=True,
+                             separators=(',', ':')).encode('ascii'))
+    key = digest.hexdigest()
+    cached_fea_path = cache_dir / f"{key}.fea"
+    if cached_fea_path.exists():
+        print(f"  Reusing cached feature code ({key[:12]}…)")
+        # features.fea is a build output in its own right — the ttf
+        # stage reads it and the ninja graph declares it — so refresh
+        # it from the cache even when the render is skipped.
+        feature_bytes = cached_fea_path.read_bytes()
+        with open(feature_path, 'wb', buffering=1 << 20) as f:
+            f.write(feature_bytes)
+        cached_fea_path.touch()  # keep the LRU pruning below honest
+        return feature_bytes.decode('ascii')
 
     mappings = ligatures_data['mappings']
 
@@ -202,161 +479,365 @@ def create_ligature_feature(font, ligatures_data):
     # Rules must be ordered longest-first so 4-digit sequences match
     # before 3-digit, etc.
 
-    liga_rules = []
-
-    # Sort mappings by input length descending (4-digit first, then 3, 2, 1)
-    sorted_mappings = sorted(mappings, key=lambda m: len(m['input']), reverse=True)
+    # Sort by leading digit first, then by input length descending within
+    # each group. Shapers organize ligature lookups as per-first-glyph
+    # LigatureSets, so keeping rules that share a first glyph adjacent
+    # matches harfbuzz's fast path and keeps each subtable's Coverage
+    # table contiguous; longest-first within a group still makes 4-digit
+    # sequences match before their prefixes.
+    sorted_mappings = sorted(
+        mappings, key=lambda m: (m['input'][0], -len(m['input'])))
+
+    # Render the rules in a single pass into one fragment buffer joined
+    # once at the end. The previous version materialized a rule string
+    # per mapping and then a second list with the subtable breaks spliced
+    # in — several intermediate strings per rule across ~10000 rules.
+    #
+    # 'subtable;' breaks keep each lookup subtable under the 16-bit
+    # offset limit. Rather than breaking at a guessed rule count, track
+    # the encoded size — a ligature entry costs about 2 bytes of Coverage
+    # plus 2 per component glyph plus 2 for the ligature glyph — and
+    # break just before a subtable would exceed a safe margin under the
+    # 65535-byte ceiling. Fewer subtables mean less per-subtable overhead
+    # and faster shaping. A break is also forced whenever the leading
+    # digit changes so every subtable covers a single contiguous
+    # first-glyph group.
+    SUBTABLE_BYTE_BUDGET = 60000
+    fragments = []
+    append = fragments.append  # bind once for the hot loop
+    rule_count = 0
+    subtable_bytes = 0
+    previous_first_digit = None
 
     for mapping in sorted_mappings:
         digits = mapping['input']
-        output_glyph = mapping['output']
-
-        # Convert digit characters to OpenType glyph names
-        input_glyphs = " ".join(digit_to_glyph[d] for d in digits)
-
-        # Create substitution rule
-        rule = f"  sub {input_glyphs} by {output_glyph};"
-        liga_rules.append(rule)
-
-    # Insert 'subtable;' breaks to avoid exceeding the 16-bit offset limit
-    # in OpenType lookup subtables. Each subtable can hold ~500 rules safely.
-    RULES_PER_SUBTABLE = 500
-    rules_with_breaks = []
-    for i, rule in enumerate(liga_rules):
-        rules_with_breaks.append(rule)
-        if (i + 1) % RULES_PER_SUBTABLE == 0 and (i + 1) < len(liga_rules):
-            rules_with_breaks.append("  subtable;")
-
-    rules_block = chr(10).join(rules_with_breaks)
-
-    # Create feature code
+        rule_bytes = 2 + 2 * len(digits) + 2
+
+        if previous_first_digit is not None and (
+                digits[0] != previous_first_digit
+                or subtable_bytes + rule_bytes > SUBTABLE_BYTE_BUDGET):
+            append("  subtable;\n")
+            subtable_bytes = 0
+        previous_first_digit = digits[0]
+        subtable_bytes += rule_bytes
+
+        append("  sub ")
+        append(" ".join([DIGIT_GLYPHS[ord(d) - 48] for d in digits]))
+        append(" by ")
+        append(mapping['output'])
+        append(";\n")
+        rule_count += 1
+
+    rules_block = "".join(fragments).rstrip("\n")
+
+    # Create feature code. The rules live in one named lookup referenced
+    # by both liga and dlig — inlining the block twice would double both
+    # the feature-compile time and the GSUB footprint for identical rules.
     feature_code = f"""
 languagesystem DFLT dflt;
 languagesystem latn dflt;
 
-feature liga {{
+lookup cistercian_liga {{
 {rules_block}
+}} cistercian_liga;
+
+feature liga {{
+  lookup cistercian_liga;
 }} liga;
 
 feature dlig {{
-{rules_block}
+  lookup cistercian_liga;
 }} dlig;
 """
 
-    # Save feature file
-    feature_path = METADATA_DIR / "features.fea"
-    with open(feature_path, 'w') as f:
-        f.write(feature_code)
-
-    print(f"  Generated {len(liga_rules)} ligature rules")
+    # Save feature file (kept for reference and manual tooling; the
+    # features are applied to the generated TTF with feaLib, which parses
+    # the ~10000-rule file much faster than FontForge's mergeFeature)
+    # The feature code is pure ASCII (glyph names and keywords), so
+    # encode once and write in binary mode — a text-mode write would run
+    # the multi-MB string through the incremental encoder and newline
+    # translation for no gain.
+    feature_bytes = feature_code.encode('ascii')
+    with open(feature_path, 'wb', buffering=1 << 20) as f:
+        f.write(feature_bytes)
+
+    cache_dir.mkdir(exist_ok=True)
+    cached_fea_path.write_bytes(feature_bytes)
+
+    # Prune old entries so stale multi-MB renders don't accumulate as
+    # the mappings (or the renderer) change across builds
+    entries = sorted(cache_dir.glob("*.fea"),
+                     key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in entries[FEA_CACHE_KEEP:]:
+        stale.unlink()
+
+    print(f"  Generated {rule_count} ligature rules")
     print(f"  Saved to: {feature_path}")
 
-    # Apply feature to font
-    try:
-        font.mergeFeature(str(feature_path))
-        print("  Applied ligature features to font")
-        return True
-    except Exception as e:
-        print(f"  Warning: Could not apply features automatically: {e}")
-        print("  Feature file saved for manual application")
-        return False
+    return feature_code
 
-def generate_font_files(font):
-    """Generate font files in various formats"""
-    print("\nGenerating font files...")
+def _require_fonttools():
+    """Import the fontTools entry points, with install hints on failure"""
+    try:
+        from fontTools.ttLib import TTFont
+        from fontTools.feaLib.builder import addOpenTypeFeaturesFromString
+    except ImportError:
+        print("\n  Error: fonttools is not installed.")
+        print("  Install it with: pip install fonttools[woff]")
+        print("  (or: pip install fonttools brotli)")
+        sys.exit(1)
+    return TTFont, addOpenTypeFeaturesFromString
 
-    # Ensure output directory exists
-    FONTS_DIR.mkdir(exist_ok=True)
+def generate_ttf(font, feature_code, ttf_path):
+    """Emit the TTF and compile the ligature features onto it"""
+    TTFont, addOpenTypeFeaturesFromString = _require_fonttools()
 
-    # Step 1: Generate TTF with FontForge (the only format it reliably produces)
-    ttf_path = FONTS_DIR / f"{FONT_NAME}.ttf"
+    # Generate TTF with FontForge (the only format it reliably produces)
     try:
         print("  Generating TTF with FontForge...")
         font.generate(str(ttf_path))
         print(f"    ✓ {ttf_path}")
     except Exception as e:
         print(f"    ✗ Error generating TTF: {e}")
-        return
+        return False
 
-    # Step 2: Convert TTF to WOFF and WOFF2 using fonttools
-    # FontForge does not reliably generate WOFF2 (it produces PostScript Type 1
-    # instead) and its WOFF output wraps CFF rather than TrueType data.
-    try:
-        from fontTools.ttLib import TTFont
-    except ImportError:
-        print("\n  Error: fonttools is not installed.")
-        print("  Install it with: pip install fonttools[woff]")
-        print("  (or: pip install fonttools brotli)")
-        sys.exit(1)
+    # FontForge is done once the TTF exists; drop its in-memory spline
+    # storage for all ~10000 glyphs before fontTools loads the file, so
+    # the two representations never coexist and peak RSS stays roughly
+    # halved through the GSUB/WOFF phase.
+    font.close()
 
     tt = TTFont(str(ttf_path))
 
-    # Generate WOFF
-    woff_path = FONTS_DIR / f"{FONT_NAME}.woff"
+    # Build the GSUB table with feaLib rather than FontForge's
+    # mergeFeature(): feaLib parses and compiles the ~10000-rule feature
+    # file measurably faster, and the TTF is post-processed with
+    # fonttools anyway.
     try:
-        print("  Generating WOFF with fonttools...")
-        tt.flavor = 'woff'
-        tt.save(str(woff_path))
-        print(f"    ✓ {woff_path}")
+        print("  Applying ligature features with feaLib...")
+        addOpenTypeFeaturesFromString(tt, feature_code)
+        print("    ✓ GSUB table built")
     except Exception as e:
-        print(f"    ✗ Error generating WOFF: {e}")
+        print(f"    ✗ Warning: Could not apply features: {e}")
+        print("      Feature file saved for manual application")
 
-    # Generate WOFF2
-    woff2_path = FONTS_DIR / f"{FONT_NAME}.woff2"
+    # Save the final GSUB-augmented TTF (overwriting FontForge's
+    # intermediate). save() writes tables in the OpenType-recommended
+    # order (reorderTables defaults to True), so every output gets the
+    # optimized table layout.
     try:
-        print("  Generating WOFF2 with fonttools...")
-        tt.flavor = 'woff2'
-        tt.save(str(woff2_path))
-        print(f"    ✓ {woff2_path}")
+        print("  Generating TTF with fonttools...")
+        tt.save(str(ttf_path))
+        print(f"    ✓ {ttf_path}")
+    except Exception as e:
+        print(f"    ✗ Error generating TTF: {e}")
+    tt.close()
+
+    return True
+
+def generate_web_flavor(flavor, label, ttf_path, out_path):
+    """Compress one web flavor from the final TTF.
+
+    FontForge does not reliably generate WOFF2 (it produces PostScript
+    Type 1 instead) and its WOFF output wraps CFF rather than TrueType
+    data, so both flavors come from fonttools. Safe to run in a thread;
+    returns its status line rather than printing it.
+    """
+    TTFont, _ = _require_fonttools()
+    try:
+        flavor_tt = TTFont(str(ttf_path))
+        flavor_tt.flavor = flavor
+        flavor_tt.save(str(out_path))
+        flavor_tt.close()
+        return f"    ✓ {out_path}"
     except ImportError:
-        print("    ✗ Error: brotli package is required for WOFF2 compression.")
-        print("      Install it with: pip install brotli")
+        return ("    ✗ Error: brotli package is required for WOFF2 "
+                "compression.\n      Install it with: pip install brotli")
     except Exception as e:
-        print(f"    ✗ Error generating WOFF2: {e}")
+        return f"    ✗ Error generating {label}: {e}"
 
-    tt.close()
+def generate_font_files(font, feature_code):
+    """Generate font files in various formats"""
+    print("\nGenerating font files...")
+
+    # Ensure output directory exists
+    FONTS_DIR.mkdir(exist_ok=True)
+
+    ttf_path = FONTS_DIR / f"{FONT_NAME}.ttf"
+    if not generate_ttf(font, feature_code, ttf_path):
+        return
+
+    # WOFF (zlib) and WOFF2 (brotli) are both compression-bound and the
+    # compressors release the GIL, so the two flavors run concurrently —
+    # this phase costs max(woff, woff2) rather than their sum. Each
+    # thread works on its own TTFont since the object is not thread-safe.
+    print("  Generating WOFF and WOFF2 with fonttools...")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        flavor_jobs = [
+            executor.submit(generate_web_flavor, 'woff', 'WOFF', ttf_path,
+                            FONTS_DIR / f"{FONT_NAME}.woff"),
+            executor.submit(generate_web_flavor, 'woff2', 'WOFF2', ttf_path,
+                            FONTS_DIR / f"{FONT_NAME}.woff2"),
+        ]
+        for job in flavor_jobs:
+            print(job.result())
 
     print("\nFont generation complete!")
 
+def check_glyphs_exist():
+    """Bail out early when the SVG glyphs have not been generated"""
+    if not GLYPHS_DIR.exists() or not any(GLYPHS_DIR.glob("*.svg")):
+        print("\nError: No SVG glyphs found!")
+        print("Please run generate-glyphs.js first to generate the glyphs.")
+        sys.exit(1)
+
 def build_font():
     """Main font building process"""
     print("=" * 60)
     print("Cistercian Font Builder")
     print("=" * 60)
 
-    # Check if glyphs exist
-    if not GLYPHS_DIR.exists() or not any(GLYPHS_DIR.glob("*.svg")):
-        print("\nError: No SVG glyphs found!")
-        print("Please run generate-glyphs.js first to generate the glyphs.")
-        sys.exit(1)
+    check_glyphs_exist()
 
     # Load metadata
-    glyphs_data, ligatures_data = load_metadata()
+    glyphs_data, ligatures_data, components_data = load_metadata()
 
     # Create font
     font = create_font(glyphs_data)
 
     # Add basic digit glyphs
-    add_basic_glyphs(font)
+    add_basic_glyphs(font, glyphs_data)
 
     # Import Cistercian glyphs
-    if not add_glyphs(font, glyphs_data):
+    if not add_glyphs(font, glyphs_data, components_data):
         print("\nError: Failed to import glyphs")
         sys.exit(1)
 
-    # Create ligature features
-    create_ligature_feature(font, ligatures_data)
+    # Create ligature features (applied to the generated TTF via feaLib)
+    feature_code = create_ligature_feature(ligatures_data)
+
+    # The metadata is no longer needed; let the GC reclaim the ~10k-entry
+    # structures before the long font-serialization phase.
+    del glyphs_data, ligatures_data, components_data
 
-    # Generate font files
-    generate_font_files(font)
+    # Generate font files (closes the FontForge font once the TTF exists)
+    generate_font_files(font, feature_code)
 
     print("\n" + "=" * 60)
     print("Build complete!")
     print("=" * 60)
 
+def sfd_stage():
+    """Pipeline stage: import all glyphs and save the intermediate SFD"""
+    check_glyphs_exist()
+    glyphs_data, _, components_data = load_metadata()
+    font = create_font(glyphs_data)
+    add_basic_glyphs(font, glyphs_data)
+    if not add_glyphs(font, glyphs_data, components_data):
+        print("\nError: Failed to import glyphs")
+        sys.exit(1)
+    BUILD_DIR.mkdir(exist_ok=True)
+    font.save(str(SFD_PATH))
+    font.close()
+    print(f"\nSaved {SFD_PATH}")
+
+def features_stage():
+    """Pipeline stage: render metadata/features.fea from ligatures.json"""
+    _, ligatures_data, _ = load_metadata()
+    create_ligature_feature(ligatures_data)
+
+def ttf_stage():
+    """Pipeline stage: intermediate SFD + features.fea -> final TTF"""
+    feature_path = METADATA_DIR / "features.fea"
+    if not SFD_PATH.exists() or not feature_path.exists():
+        print("Error: run the sfd and features stages first")
+        sys.exit(1)
+    font = fontforge.open(str(SFD_PATH))
+    FONTS_DIR.mkdir(exist_ok=True)
+    if not generate_ttf(font, feature_path.read_text(),
+                        FONTS_DIR / f"{FONT_NAME}.ttf"):
+        sys.exit(1)
+
+def flavor_stage(flavor):
+    """Pipeline stage: final TTF -> one web flavor (woff or woff2)"""
+    ttf_path = FONTS_DIR / f"{FONT_NAME}.ttf"
+    if not ttf_path.exists():
+        print("Error: run the ttf stage first")
+        sys.exit(1)
+    status = generate_web_flavor(flavor, flavor.upper(), ttf_path,
+                                 FONTS_DIR / f"{FONT_NAME}.{flavor}")
+    print(status)
+    if "✗" in status:
+        sys.exit(1)
+
+def write_ninja():
+    """Write a build.ninja driving the pipeline stages.
+
+    Ninja reruns only the stages whose inputs changed and schedules
+    independent edges concurrently (WOFF and WOFF2 compress in
+    parallel), so incremental rebuilds skip the expensive glyph import
+    entirely. metadata/glyphs.json stands in for the glyphs directory as
+    the import input since the generator rewrites both together.
+    """
+    script = os.path.relpath(__file__, PROJECT_ROOT)
+    rules = (
+        ("import_glyphs", "sfd"),
+        ("build_features", "features"),
+        ("generate_ttf", "ttf"),
+        ("ttf_to_woff", "woff"),
+        ("ttf_to_woff2", "woff2"),
+    )
+    lines = [f"# Generated by {script} --write-ninja", ""]
+    for rule, stage in rules:
+        lines += [f"rule {rule}",
+                  f"  command = python3 {script} --stage {stage}",
+                  f"  description = {stage} stage",
+                  ""]
+    sfd = os.path.relpath(SFD_PATH, PROJECT_ROOT)
+    ttf = os.path.relpath(FONTS_DIR / f"{FONT_NAME}.ttf", PROJECT_ROOT)
+    lines += [
+        f"build {sfd}: import_glyphs metadata/glyphs.json",
+        "build metadata/features.fea: build_features metadata/ligatures.json",
+        f"build {ttf}: generate_ttf {sfd} metadata/features.fea",
+        f"build fonts/{FONT_NAME}.woff: ttf_to_woff {ttf}",
+        f"build fonts/{FONT_NAME}.woff2: ttf_to_woff2 {ttf}",
+        "",
+        f"default fonts/{FONT_NAME}.woff fonts/{FONT_NAME}.woff2",
+        "",
+    ]
+
+    ninja_path = PROJECT_ROOT / "build.ninja"
+    ninja_path.write_text("\n".join(lines))
+    print(f"Wrote {ninja_path}")
+    print("Run 'ninja' from the project root to build incrementally")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the Cistercian font, wholly or one stage at a time")
+    parser.add_argument(
+        '--stage', choices=('sfd', 'features', 'ttf', 'woff', 'woff2'),
+        help="run a single pipeline stage (used by build.ninja)")
+    parser.add_argument(
+        '--write-ninja', action='store_true',
+        help="write build.ninja for incremental rebuilds and exit")
+    args = parser.parse_args()
+
+    if args.write_ninja:
+        write_ninja()
+    elif args.stage == 'sfd':
+        sfd_stage()
+    elif args.stage == 'features':
+        features_stage()
+    elif args.stage == 'ttf':
+        ttf_stage()
+    elif args.stage in ('woff', 'woff2'):
+        flavor_stage(args.stage)
+    else:
+        build_font()
+
 if __name__ == "__main__":
     try:
-        build_font()
+        main()
     except KeyboardInterrupt:
         print("\n\nBuild cancelled by user")
         sys.exit(1)
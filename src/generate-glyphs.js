@@ -38,6 +38,25 @@ const FONT_CONFIG = {
   strokeColor: "#000",
 };
 
+/**
+ * Write a file only when its content actually changed.
+ *
+ * The generator's output is deterministic, so on a rebuild most files
+ * come out byte-identical. Skipping the write keeps their mtimes stable,
+ * which lets ninja treat the downstream font stages as up to date
+ * instead of rebuilding everything after every generator run.
+ */
+function writeFileIfChanged(filePath, content) {
+  try {
+    if (fs.readFileSync(filePath, "utf8") === content) {
+      return;
+    }
+  } catch {
+    // Missing file: fall through to the write
+  }
+  fs.writeFileSync(filePath, content, "utf8");
+}
+
 /**
  * Configure the Cistercian generator for font-optimized output
  */
@@ -52,6 +71,27 @@ function setupCistercianConfig() {
   });
 }
 
+/**
+ * Extract the <line> elements from a generated SVG string
+ */
+function extractLines(svgString) {
+  return svgString.match(/<line[^>]*>/g) || [];
+}
+
+/**
+ * Build a normalized glyph SVG from a set of <line> elements
+ */
+function buildGlyphSVG(lines, title, id) {
+  const viewBox = `0 0 ${FONT_CONFIG.svgWidth} ${FONT_CONFIG.svgHeight}`;
+
+  return `<svg viewBox="${viewBox}" xmlns="http://www.w3.org/2000/svg">
+  <title>${title}</title>
+  <g id="${id}">
+    ${lines.join("\n    ")}
+  </g>
+</svg>`;
+}
+
 /**
  * Normalize SVG for font usage
  * - Remove XML declaration and DOCTYPE
@@ -66,33 +106,290 @@ function normalizeSVGForFont(svgString, number) {
     .replace(/<!DOCTYPE[^>]*>/, "")
     .trim();
 
-  // Extract the inner content (lines)
-  const lineMatches = cleanSvg.match(/<line[^>]*>/g) || [];
+  return buildGlyphSVG(
+    extractLines(cleanSvg),
+    `Cistercian numeral ${number}`,
+    `glyph-${number}`,
+  );
+}
 
-  // Create normalized SVG with proper viewBox and coordinate system
-  const viewBox = `0 0 ${FONT_CONFIG.svgWidth} ${FONT_CONFIG.svgHeight}`;
+/**
+ * Compute the bounding box of a normalized glyph SVG, in font units.
+ *
+ * The glyphs are plain <line> strokes with square caps, so the extents
+ * can be computed exactly from the endpoint coordinates: each endpoint
+ * extends half a stroke width along the line direction (the cap) and
+ * half a stroke width perpendicular to it. Precomputing this here lets
+ * the font builder skip FontForge's per-glyph boundingBox() traversal.
+ *
+ * FontForge scales an imported SVG so the viewBox height spans the em,
+ * with the y axis flipped against the ascender; the same mapping is
+ * applied here so the result is directly usable in font coordinates.
+ */
+function computeGlyphBBox(svgString) {
+  const lineMatches = svgString.match(/<line[^>]*>/g) || [];
+  if (lineMatches.length === 0) {
+    return null;
+  }
 
-  const normalizedSvg = `<svg viewBox="${viewBox}" xmlns="http://www.w3.org/2000/svg">
-  <title>Cistercian numeral ${number}</title>
-  <g id="glyph-${number}">
-    ${lineMatches.join("\n    ")}
-  </g>
-</svg>`;
+  const halfStroke = FONT_CONFIG.strokeWidth / 2;
+  let xMin = Infinity;
+  let yMin = Infinity;
+  let xMax = -Infinity;
+  let yMax = -Infinity;
+
+  for (const line of lineMatches) {
+    const coord = (name) => {
+      const m = line.match(new RegExp(`\\b${name}="(-?[\\d.]+)"`));
+      return m ? parseFloat(m[1]) : 0;
+    };
+    const x1 = coord("x1");
+    const y1 = coord("y1");
+    const x2 = coord("x2");
+    const y2 = coord("y2");
+
+    const length = Math.hypot(x2 - x1, y2 - y1) || 1;
+    const dx = ((x2 - x1) / length) * halfStroke;
+    const dy = ((y2 - y1) / length) * halfStroke;
+
+    // Four corners of the stroked segment (square caps).
+    const corners = [
+      [x1 - dx - dy, y1 - dy + dx],
+      [x1 - dx + dy, y1 - dy - dx],
+      [x2 + dx - dy, y2 + dy + dx],
+      [x2 + dx + dy, y2 + dy - dx],
+    ];
+    for (const [x, y] of corners) {
+      xMin = Math.min(xMin, x);
+      yMin = Math.min(yMin, y);
+      xMax = Math.max(xMax, x);
+      yMax = Math.max(yMax, y);
+    }
+  }
+
+  // Map SVG coordinates to font units (y axis flips against the ascender).
+  const scale = FONT_CONFIG.unitsPerEm / FONT_CONFIG.svgHeight;
+  return [
+    xMin * scale,
+    FONT_CONFIG.ascender - yMax * scale,
+    xMax * scale,
+    FONT_CONFIG.ascender - yMin * scale,
+  ];
+}
+
+// Seven-segment endpoints for the fallback digit outlines, drawn with
+// the same stroke style as the numerals so digits still render sensibly
+// when an app has ligatures disabled
+const DIGIT_SEGMENTS = {
+  a: [30, 30, 90, 30], // top
+  b: [90, 30, 90, 90], // top right
+  c: [90, 90, 90, 150], // bottom right
+  d: [30, 150, 90, 150], // bottom
+  e: [30, 90, 30, 150], // bottom left
+  f: [30, 30, 30, 90], // top left
+  g: [30, 90, 90, 90], // middle
+};
+
+const DIGIT_SEGMENT_SETS = [
+  "abcdef", // 0
+  "bc", // 1
+  "abged", // 2
+  "abgcd", // 3
+  "fgbc", // 4
+  "afgcd", // 5
+  "afgecd", // 6
+  "abc", // 7
+  "abcdefg", // 8
+  "abcdfg", // 9
+];
+
+const DIGIT_GLYPH_NAMES = [
+  "zero",
+  "one",
+  "two",
+  "three",
+  "four",
+  "five",
+  "six",
+  "seven",
+  "eight",
+  "nine",
+];
+
+/**
+ * Generate visible fallback outlines for the ASCII digits 0-9.
+ *
+ * The digit glyphs are the ligature inputs, so they ship in the font
+ * either way; giving them seven-segment outlines (instead of blank
+ * 600-unit-wide glyphs) means users whose apps disable ligatures still
+ * see meaningful digits.
+ */
+function generateDigitGlyphs(glyphsDir) {
+  console.log("Generating fallback digit glyphs...");
+
+  const metadata = [];
+  for (let digit = 0; digit <= 9; digit++) {
+    const lines = [...DIGIT_SEGMENT_SETS[digit]].map((segment) => {
+      const [x1, y1, x2, y2] = DIGIT_SEGMENTS[segment];
+      return `<line x1="${x1}" y1="${y1}" x2="${x2}" y2="${y2}" stroke="${FONT_CONFIG.strokeColor}" stroke-width="${FONT_CONFIG.strokeWidth}" stroke-linecap="square"></line>`;
+    });
+    const svg = buildGlyphSVG(lines, `Digit ${digit}`, `digit-${digit}`);
+    const svgFile = `digit_${digit}.svg`;
+    writeFileIfChanged(path.join(glyphsDir, svgFile), svg);
+    metadata.push({
+      digit: digit,
+      glyphName: DIGIT_GLYPH_NAMES[digit],
+      svgFile: svgFile,
+      width: FONT_CONFIG.glyphWidth,
+      bbox: computeGlyphBBox(svg),
+    });
+  }
 
-  return normalizedSvg;
+  return metadata;
+}
+
+// Quadrant places of a Cistercian numeral and their component-name keys
+const COMPONENT_PLACES = [
+  { key: "u", place: 1 }, // units (upper right)
+  { key: "t", place: 10 }, // tens (upper left)
+  { key: "h", place: 100 }, // hundreds (lower right)
+  { key: "m", place: 1000 }, // thousands (lower left)
+];
+
+/**
+ * Derive the shared component strokes and per-numeral composition.
+ *
+ * Every Cistercian numeral is the vertical stem plus up to four quadrant
+ * strokes, and the generator draws each stroke at the same absolute
+ * coordinates in every numeral that contains it. That means the ~36
+ * quadrant shapes can be recovered by set operations on the <line>
+ * elements: the stem is what all numerals share, and the stroke for
+ * digit d in a place is what d*place draws beyond the stem.
+ *
+ * Emits one SVG per component plus components.json mapping each numeral
+ * glyph to its component list, so the font builder can import 37 shapes
+ * once and assemble the 9 999 numerals as composite glyphs. Numerals
+ * whose lines don't decompose exactly into stem + quadrant strokes are
+ * left out of the map and fall back to their own SVG.
+ */
+function generateComponents(linesByNumber, glyphsDir, metadataDir) {
+  console.log("Deriving component strokes...");
+
+  // The stem is the set of lines every numeral shares
+  let stemSet = null;
+  for (const lines of linesByNumber.values()) {
+    const lineSet = new Set(lines);
+    stemSet =
+      stemSet === null
+        ? lineSet
+        : new Set([...stemSet].filter((l) => lineSet.has(l)));
+  }
+  const stem = [...(stemSet || [])];
+
+  // Each quadrant stroke is what d*place draws beyond the stem
+  const componentLines = new Map();
+  componentLines.set("stem", stem);
+  for (const { key, place } of COMPONENT_PLACES) {
+    for (let digit = 1; digit <= 9; digit++) {
+      const lines = linesByNumber.get(digit * place);
+      if (!lines) {
+        continue;
+      }
+      componentLines.set(
+        `${key}${digit}`,
+        lines.filter((l) => !stemSet.has(l)),
+      );
+    }
+  }
+
+  // Map each numeral to its components, validating that the parts
+  // reproduce exactly the lines the generator drew for it
+  const glyphComponents = {};
+  let mismatches = 0;
+  for (const [number, lines] of linesByNumber) {
+    const parts = ["stem"];
+    const expected = [...stem];
+    let decomposable = true;
+    for (const { key, place } of COMPONENT_PLACES) {
+      const digit = Math.floor(number / place) % 10;
+      if (digit === 0) {
+        continue;
+      }
+      const part = `${key}${digit}`;
+      const partLines = componentLines.get(part);
+      if (!partLines) {
+        decomposable = false;
+        break;
+      }
+      parts.push(part);
+      expected.push(...partLines);
+    }
+
+    if (
+      decomposable &&
+      expected.length === lines.length &&
+      [...expected].sort().join("\n") === [...lines].sort().join("\n")
+    ) {
+      glyphComponents[`cistercian_${number}`] = parts.map(
+        (p) => `cistercian_part_${p}`,
+      );
+    } else {
+      mismatches++;
+    }
+  }
+
+  if (mismatches > 0) {
+    console.warn(
+      `${mismatches} numeral(s) did not decompose into components and will use their own SVG`,
+    );
+  }
+
+  // Write component SVGs and metadata
+  const componentMetadata = [];
+  for (const [part, lines] of componentLines) {
+    const svgFilename = `component_${part}.svg`;
+    const svg = buildGlyphSVG(lines, `Cistercian component ${part}`, `component-${part}`);
+    writeFileIfChanged(path.join(glyphsDir, svgFilename), svg);
+    componentMetadata.push({
+      name: `cistercian_part_${part}`,
+      svgFile: svgFilename,
+      bbox: computeGlyphBBox(svg),
+    });
+  }
+
+  const componentsPath = path.join(metadataDir, "components.json");
+  writeFileIfChanged(
+    componentsPath,
+    JSON.stringify(
+      {
+        components: componentMetadata,
+        glyphs: glyphComponents,
+        totalComposites: Object.keys(glyphComponents).length,
+      },
+      null,
+      2,
+    ),
+  );
+
+  console.log(
+    `Generated ${componentMetadata.length} components covering ${Object.keys(glyphComponents).length} numerals`,
+  );
+  console.log(`- Metadata: ${componentsPath}`);
 }
 
 /**
  * Generate glyph metadata for font creation
  */
-function generateGlyphMetadata(number) {
+function generateGlyphMetadata(number, bbox) {
   return {
     number: number,
     unicode: null, // Will be assigned during font creation
     glyphName: `cistercian_${number}`,
+    svgFile: `cistercian_${number.toString().padStart(4, "0")}.svg`,
     width: FONT_CONFIG.glyphWidth,
     leftSideBearing: (FONT_CONFIG.glyphWidth - FONT_CONFIG.svgWidth) / 2,
     rightSideBearing: (FONT_CONFIG.glyphWidth - FONT_CONFIG.svgWidth) / 2,
+    bbox: bbox,
   };
 }
 
@@ -117,6 +414,7 @@ function generateAllGlyphs() {
   console.log("Generating glyphs for numbers 1-9999...");
 
   const glyphMetadata = [];
+  const linesByNumber = new Map();
   const batchSize = 100;
   let processed = 0;
 
@@ -132,15 +430,16 @@ function generateAllGlyphs() {
 
       // Normalize SVG for font usage
       const normalizedSvg = normalizeSVGForFont(rawSvg, number);
+      linesByNumber.set(number, extractLines(normalizedSvg));
 
-      // Generate metadata
-      const metadata = generateGlyphMetadata(number);
+      // Generate metadata (with precomputed bounding box)
+      const bbox = computeGlyphBBox(normalizedSvg);
+      const metadata = generateGlyphMetadata(number, bbox);
       glyphMetadata.push(metadata);
 
       // Save SVG file
-      const svgFilename = `cistercian_${number.toString().padStart(4, "0")}.svg`;
-      const svgPath = path.join(glyphsDir, svgFilename);
-      fs.writeFileSync(svgPath, normalizedSvg, "utf8");
+      const svgPath = path.join(glyphsDir, metadata.svgFile);
+      writeFileIfChanged(svgPath, normalizedSvg);
 
       processed++;
 
@@ -158,24 +457,29 @@ function generateAllGlyphs() {
     }
   }
 
+  // Generate fallback outlines for the ASCII digits
+  const digitGlyphs = generateDigitGlyphs(glyphsDir);
+
   // Save metadata
   console.log("Saving glyph metadata...");
   const metadataPath = path.join(metadataDir, "glyphs.json");
-  fs.writeFileSync(
+  writeFileIfChanged(
     metadataPath,
     JSON.stringify(
       {
         fontConfig: FONT_CONFIG,
         glyphs: glyphMetadata,
+        digitGlyphs: digitGlyphs,
         totalGlyphs: glyphMetadata.length,
-        generatedAt: new Date().toISOString(),
       },
       null,
       2,
     ),
-    "utf8",
   );
 
+  // Derive shared components for composite glyph assembly
+  generateComponents(linesByNumber, glyphsDir, metadataDir);
+
   // Generate ligature mapping
   console.log("Generating ligature mappings...");
   generateLigatureMappings(glyphMetadata);
@@ -211,11 +515,10 @@ function generateLigatureMappings(glyphMetadata) {
   const ligatureData = {
     mappings: mappings,
     totalMappings: mappings.length,
-    generatedAt: new Date().toISOString(),
   };
 
   const ligaturePath = path.join(__dirname, "..", "metadata", "ligatures.json");
-  fs.writeFileSync(ligaturePath, JSON.stringify(ligatureData, null, 2), "utf8");
+  writeFileIfChanged(ligaturePath, JSON.stringify(ligatureData, null, 2));
 
   console.log(`Generated ${mappings.length} ligature mappings`);
 }
@@ -230,6 +533,9 @@ if (require.main === module) {
 module.exports = {
   generateAllGlyphs,
   normalizeSVGForFont,
+  computeGlyphBBox,
+  generateComponents,
+  generateDigitGlyphs,
   generateGlyphMetadata,
   FONT_CONFIG,
 };